@@ -78,6 +78,7 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
 env = environ.Env()
+# Variables already in the environment take precedence over .env
 env.read_env(os.path.join(BASE_DIR, '.env'))
 
 SECRET_KEY = env('DJANGO_SECRET_KEY')
@@ -92,6 +93,10 @@ DATABASES = {
     }
 }
 
+# Lets tests and benchmarks run without the MySQL server, e.g. DATABASE_URL=sqlite://:memory:
+if 'DATABASE_URL' in os.environ:
+    DATABASES['default'] = env.db('DATABASE_URL')
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -128,6 +133,39 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+
+# Media files (user uploads)
+# Files are deduplicated by content (marketplace.storage). They're kept under
+# MEDIA_ROOT unless MEDIA_S3_BUCKET points at an S3-compatible bucket
+# (MinIO works via MEDIA_S3_ENDPOINT_URL), which needs django-storages and boto3.
+
+MEDIA_ROOT = BASE_DIR / 'media'
+MEDIA_URL = 'media/'
+
+if env('MEDIA_S3_BUCKET', default=None):
+    MEDIA_BACKEND = 'storages.backends.s3.S3Storage'
+    MEDIA_BACKEND_OPTIONS = {
+        'bucket_name': env('MEDIA_S3_BUCKET'),
+        'endpoint_url': env('MEDIA_S3_ENDPOINT_URL', default=None),
+        'access_key': env('MEDIA_S3_ACCESS_KEY', default=None),
+        'secret_key': env('MEDIA_S3_SECRET_KEY', default=None),
+        # Content-addressed names never collide, skip the existence check
+        'file_overwrite': True,
+    }
+else:
+    MEDIA_BACKEND = 'django.core.files.storage.FileSystemStorage'
+    MEDIA_BACKEND_OPTIONS = {'location': MEDIA_ROOT, 'base_url': MEDIA_URL}
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'marketplace.storage.ContentAddressedStorage',
+        'OPTIONS': {'backend': MEDIA_BACKEND, 'backend_options': MEDIA_BACKEND_OPTIONS},
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,33 @@
+"""
+Lean settings profile for management commands, cron jobs and background workers.
+
+Use it with DJANGO_SETTINGS_MODULE=backend.settings_worker. It keeps the
+database and auth setup from backend.settings but drops everything that only
+matters when serving HTTP (admin, sessions, messages, static files,
+templates, middleware) and the django_extensions dev tooling, so short-lived
+processes import and set up fewer apps on boot.
+
+Django can't add apps once the registry is set up, so apps are loaded lazily
+per process instead: a worker or command that needs one of the dropped apps
+(e.g. sessions for clearsessions) lists it in WORKER_EXTRA_APPS, and only
+that process pays for it.
+
+    WORKER_EXTRA_APPS=django.contrib.sessions python manage.py clearsessions
+
+Run benchmarks/startup.py to compare cold-start time against backend.settings.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'marketplace',
+] + env.list('WORKER_EXTRA_APPS', default=[])
+
+MIDDLEWARE = []
+
+TEMPLATES = []
+
+# Workers don't serve requests; the full urlconf imports the admin site
+ROOT_URLCONF = 'backend.urls_worker'
@@ -0,0 +1,7 @@
+"""
+URL configuration for the lean worker settings profile (backend.settings_worker).
+
+Workers and management commands don't serve HTTP, so there is nothing to route.
+"""
+
+urlpatterns = []
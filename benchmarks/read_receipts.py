@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+Write amplification of marking a message thread as read.
+
+Seeds threads of increasing length in a throwaway test database and compares
+the old approach (one UPDATE per unread message, as ``Message.read`` used to
+need) with moving the thread's ReadReceipt watermark. The first mark on a
+thread also creates its receipt, so it shows an INSERT after the UPDATE miss;
+later marks are a single UPDATE.
+
+    python benchmarks/read_receipts.py
+    python benchmarks/read_receipts.py --sizes 10 100 1000 5000
+
+Uses DJANGO_SETTINGS_MODULE (default: backend.settings_worker).
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings_worker')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from marketplace.models import Listing, Message, ReadReceipt, User  # noqa: E402
+
+
+def writes(queries):
+    return sum(1 for query in queries if query['sql'].lstrip().upper().startswith(('UPDATE', 'INSERT')))
+
+
+def bench(size):
+    seller = User.objects.create(username=f'seller-{size}')
+    buyer = User.objects.create(username=f'buyer-{size}')
+    listing = Listing.objects.create(seller=seller, title='bench', description='bench',
+                                     condition='new', price=1)
+    Message.objects.bulk_create(
+        Message(sender=buyer, receiver=seller, listing=listing, content=str(i)) for i in range(size)
+    )
+
+    # Legacy: load the unread messages and save each one (the read column no
+    # longer exists, so the per-row UPDATE is reproduced on timestamp)
+    with CaptureQueriesContext(connection) as legacy:
+        started = time.perf_counter()
+        for message in Message.objects.filter(receiver=seller, listing=listing, sender=buyer):
+            message.save(update_fields=['timestamp'])
+        legacy_ms = (time.perf_counter() - started) * 1000
+
+    with CaptureQueriesContext(connection) as watermark:
+        started = time.perf_counter()
+        ReadReceipt.mark_read(seller, listing, buyer)
+        watermark_ms = (time.perf_counter() - started) * 1000
+
+    assert not Message.objects.unread_for(seller).filter(listing=listing).exists()
+    return (size, len(legacy), writes(legacy), legacy_ms,
+            len(watermark), writes(watermark), watermark_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000], help='messages per thread')
+    args = parser.parse_args()
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        print(f"{'messages':>8} | {'legacy queries':>14} {'writes':>6} {'ms':>8} | "
+              f"{'watermark queries':>17} {'writes':>6} {'ms':>8}")
+        for size in args.sizes:
+            size, lq, lw, lms, wq, ww, wms = bench(size)
+            print(f"{size:>8} | {lq:>14} {lw:>6} {lms:>8.1f} | {wq:>17} {ww:>6} {wms:>8.1f}")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+"""
+Cold-start benchmark for Django settings profiles.
+
+Runs ``python -X importtime manage.py check`` in a fresh interpreter for each
+settings module and reports the median wall time, the total time spent
+importing modules, and the slowest top-level imports.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --check
+    python benchmarks/startup.py --runs 10 --save
+
+Absolute times depend on the machine, so the tracked baseline
+(benchmarks/startup_baseline.json) only records each profile's import time
+as a ratio of the first profile's (the full backend.settings), measured in
+the same run. --check fails (exit code 1) if a profile's ratio has grown by
+more than --tolerance; --save records the current ratios. Unless
+DATABASE_URL is set, the interpreters run against in-memory sqlite, so no
+database server or driver is needed and the numbers only cover Django's own
+startup.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_PROFILES = ['backend.settings', 'backend.settings_worker']
+
+BASELINE = Path(__file__).resolve().parent / 'startup_baseline.json'
+
+
+def run_once(settings_module):
+    """Boot Django once; return wall seconds, total import us and cumulative us per top-level import."""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module)
+    env.setdefault('DATABASE_URL', 'sqlite://:memory:')
+    env.setdefault('DJANGO_SECRET_KEY', 'startup-benchmark')
+    env.setdefault('DJANGO_DB_PASSWORD', '')
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', 'manage.py', 'check'],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        sys.exit(f"manage.py check failed for {settings_module}:\n{result.stderr[-2000:]}")
+
+    self_total = 0
+    top_level = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        self_total += int(self_us)
+        # top-level imports are the ones printed without indentation
+        if not name.startswith('  '):
+            top_level[name.strip()] = int(cumulative_us)
+    return wall, self_total, top_level
+
+
+def measure(settings_module, runs, top):
+    walls, import_totals, slowest = [], [], {}
+    for _ in range(runs):
+        wall, import_total, top_level = run_once(settings_module)
+        walls.append(wall)
+        import_totals.append(import_total)
+        for name, us in top_level.items():
+            slowest[name] = max(slowest.get(name, 0), us)
+    return {
+        'wall_ms': round(statistics.median(walls) * 1000, 1),
+        'import_ms': round(statistics.median(import_totals) / 1000, 1),
+        'slowest_imports_ms': {
+            name: round(us / 1000, 1)
+            for name, us in sorted(slowest.items(), key=lambda item: -item[1])[:top]
+        },
+    }
+
+
+def import_ratios(results):
+    """Each profile's import time relative to the first profile's, from the same run."""
+    reference = next(iter(results.values()))['import_ms']
+    return {module: round(result['import_ms'] / reference, 3) for module, result in list(results.items())[1:]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--settings', nargs='+', default=DEFAULT_PROFILES,
+                        help='settings modules to compare; the first is the reference for ratios')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per profile')
+    parser.add_argument('--top', type=int, default=10, help='slowest top-level imports to list')
+    parser.add_argument('--check', action='store_true', help='fail if a ratio regressed against the baseline')
+    parser.add_argument('--save', action='store_true', help='record this run\'s ratios as the tracked baseline')
+    parser.add_argument('--baseline', type=Path, default=BASELINE, help='baseline JSON to check against or save to')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='allowed ratio growth (0.1 = 10%%)')
+    args = parser.parse_args()
+
+    results = {module: measure(module, args.runs, args.top) for module in args.settings}
+    ratios = import_ratios(results)
+
+    for module, result in results.items():
+        ratio = f", {ratios[module]:.3f}x {args.settings[0]} imports" if module in ratios else ''
+        print(f"{module}: {result['wall_ms']} ms wall, {result['import_ms']} ms importing{ratio}")
+        for name, ms in result['slowest_imports_ms'].items():
+            print(f"    {ms:>8} ms  {name}")
+
+    if args.save:
+        baseline = {'reference': args.settings[0], 'import_ratios': ratios}
+        args.baseline.write_text(json.dumps(baseline, indent=2) + '\n')
+        return
+
+    if args.check:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline['reference'] != args.settings[0]:
+            sys.exit(f"Baseline ratios are relative to {baseline['reference']}, not {args.settings[0]}")
+        regressions = []
+        for module, ratio in ratios.items():
+            if module not in baseline['import_ratios']:
+                continue
+            limit = baseline['import_ratios'][module] * (1 + args.tolerance)
+            if ratio > limit:
+                regressions.append(f"{module}: {ratio:.3f}x > {limit:.3f}x allowed")
+        if regressions:
+            sys.exit('Startup regression:\n  ' + '\n  '.join(regressions))
+
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,15 @@ class ListingAdmin(admin.ModelAdmin):
   list_editable = [field.name for field in models.Listing._meta.fields 
                    if field.name not in ['id', 'date_posted', 'seller']]
   list_per_page = 20
+  # category is nullable, so the admin's automatic select_related() skips it
+  list_select_related = ['seller', 'category']
+
+  def formfield_for_foreignkey(self, db_field, request, **kwargs):
+    formfield = super().formfield_for_foreignkey(db_field, request, **kwargs)
+    # Evaluate the category choices once, instead of once per list_editable row
+    if db_field.name == 'category':
+      formfield.choices = list(formfield.choices)
+    return formfield
 
 
 @admin.register(models.User)
@@ -25,7 +34,7 @@ class UserAdmin(admin.ModelAdmin):
 
 @admin.register(models.ListingImage)
 class ListingImageAdmin(admin.ModelAdmin):
-  pass
+  list_select_related = ['listing']
 
 
 @admin.register(models.Category)
@@ -35,14 +44,34 @@ class CategoryAdmin(admin.ModelAdmin):
 
 @admin.register(models.Message)
 class MessageAdmin(admin.ModelAdmin):
-  pass
+  list_select_related = ['sender', 'receiver', 'listing']
 
 
 @admin.register(models.Review)
 class ReviewAdmin(admin.ModelAdmin):
-  pass
+  list_select_related = ['reviewer', 'seller']
 
 
 @admin.register(models.Notification)
 class NotificationAdmin(admin.ModelAdmin):
-  pass
\ No newline at end of file
+  list_select_related = ['user']
+
+
+@admin.register(models.SavedSearch)
+class SavedSearchAdmin(admin.ModelAdmin):
+  pass
+
+
+@admin.register(models.SavedSearchAlert)
+class SavedSearchAlertAdmin(admin.ModelAdmin):
+  pass
+
+
+@admin.register(models.ReadReceipt)
+class ReadReceiptAdmin(admin.ModelAdmin):
+  pass
+
+
+@admin.register(models.MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+  pass
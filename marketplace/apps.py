@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save, pre_save
 
 
 class MarketplaceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'marketplace'
+
+    def ready(self):
+        from . import search, storage
+        post_save.connect(search.listing_saved, sender=self.get_model('Listing'),
+                          dispatch_uid='marketplace.match_saved_searches')
+        for model_name in ('ListingImage', 'User'):
+            model = self.get_model(model_name)
+            pre_save.connect(storage.remember_files, sender=model,
+                             dispatch_uid=f'marketplace.remember_files.{model_name}')
+            post_save.connect(storage.reference_files, sender=model,
+                              dispatch_uid=f'marketplace.reference_files.{model_name}')
+            post_delete.connect(storage.release_files, sender=model,
+                                dispatch_uid=f'marketplace.release_files.{model_name}')
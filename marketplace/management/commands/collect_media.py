@@ -0,0 +1,17 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from marketplace.storage import collect_unreferenced
+
+
+class Command(BaseCommand):
+    help = 'Remove stored media files that no saved listing image or profile refers to.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=60,
+                            help='only collect files not stored or reused for this many minutes (default: 60)')
+
+    def handle(self, *args, **options):
+        removed = collect_unreferenced(timedelta(minutes=options['older_than']))
+        self.stdout.write(f'Removed {removed} unreferenced file(s).')
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.16 on 2026-10-19 04:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def collapse_read_flags(apps, schema_editor):
+    """Turn per-message read flags into one watermark per reader per thread (newest read message)."""
+    Message = apps.get_model('marketplace', 'Message')
+    ReadReceipt = apps.get_model('marketplace', 'ReadReceipt')
+    watermarks = (Message.objects.filter(read=True)
+                  .values('receiver_id', 'listing_id', 'sender_id')
+                  .annotate(last_read_id=models.Max('id'))
+                  .order_by())
+    ReadReceipt.objects.bulk_create(
+        (ReadReceipt(reader_id=row['receiver_id'], listing_id=row['listing_id'],
+                     partner_id=row['sender_id'], last_read_id=row['last_read_id'])
+         for row in watermarks.iterator()),
+        batch_size=1000,
+    )
+
+
+def expand_read_flags(apps, schema_editor):
+    """Set the read flag on every message at or below its thread's watermark."""
+    Message = apps.get_model('marketplace', 'Message')
+    ReadReceipt = apps.get_model('marketplace', 'ReadReceipt')
+    for receipt in ReadReceipt.objects.iterator():
+        Message.objects.filter(receiver_id=receipt.reader_id, listing_id=receipt.listing_id,
+                               sender_id=receipt.partner_id, id__lte=receipt.last_read_id).update(read=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0008_savedsearch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReadReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_read_id', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_receipts', to='marketplace.listing')),
+                ('partner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='marketplace.user')),
+                ('reader', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_receipts', to='marketplace.user')),
+            ],
+            options={
+                'verbose_name': 'ReadReceipt',
+                'verbose_name_plural': 'ReadReceipts',
+                'unique_together': {('reader', 'listing', 'partner')},
+            },
+        ),
+        migrations.RunPython(collapse_read_flags, expand_read_flags),
+        migrations.RemoveField(
+            model_name='message',
+            name='read',
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.16 on 2026-10-19 04:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0010_mediablob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SavedSearchAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_search_alerts', to='marketplace.listing')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_search_alerts', to='marketplace.user')),
+            ],
+            options={
+                'verbose_name': 'SavedSearchAlert',
+                'verbose_name_plural': 'SavedSearchAlerts',
+                'unique_together': {('user', 'listing')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-19 04:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0011_savedsearchalert'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mediablob',
+            name='ref_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
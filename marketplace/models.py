@@ -1,8 +1,13 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser, Group, Permission
+from django.core.exceptions import ValidationError
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
-class User(AbstractUser):
+from .storage import AtomicSaveMixin
+
+
+class User(AtomicSaveMixin, AbstractUser):
     """
     Custom user model extending Django's AbstractUser.
     
@@ -90,7 +95,7 @@ class Listing(models.Model):
         return self.title
 
 
-class ListingImage(models.Model):
+class ListingImage(AtomicSaveMixin, models.Model):
     """
     Model representing an image associated with a listing.
     
@@ -136,24 +141,43 @@ class Category(models.Model):
         return self.name
 
 
+class MessageQuerySet(models.QuerySet):
+    def unread_for(self, user):
+        """
+        Messages received by ``user`` that are past their read receipt watermark.
+
+        Threads without a ReadReceipt are treated as entirely unread.
+        """
+        watermark = ReadReceipt.objects.filter(
+            reader=user,
+            listing=models.OuterRef('listing'),
+            partner=models.OuterRef('sender'),
+        ).values('last_read_id')[:1]
+        return (self.filter(receiver=user)
+                .annotate(read_watermark=Coalesce(models.Subquery(watermark), 0))
+                .filter(id__gt=models.F('read_watermark')))
+
+
 class Message(models.Model):
     """
     Model representing a message sent between users related to a listing.
-    
+
+    Read state is not stored per message; see ReadReceipt.
+
     Fields:
         sender (ForeignKey): The user sending the message.
         receiver (ForeignKey): The user receiving the message.
         listing (ForeignKey): The listing the message is about.
         content (CharField): The content of the message.
         timestamp (DateTimeField): The time the message was sent.
-        read (BooleanField): Indicates if the message has been read.
     """
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_messages')
     receiver = models.ForeignKey(User, on_delete=models.CASCADE, related_name='received_messages')
     listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='messages')
     content = models.CharField(max_length=255)
     timestamp = models.DateTimeField(auto_now_add=True)
-    read = models.BooleanField(default=False)
+
+    objects = MessageQuerySet.as_manager()
 
     class Meta:
         ordering = ['timestamp']
@@ -164,6 +188,62 @@ class Message(models.Model):
         return f"Message from {self.sender} to {self.receiver} about {self.listing.title}"
 
 
+class ReadReceipt(models.Model):
+    """
+    Model representing how far a user has read a message thread.
+
+    A thread is the conversation between two users about one listing. Every
+    message ``reader`` received in the thread with an id up to and including
+    ``last_read_id`` counts as read, so marking a thread as read is a single
+    row write no matter how many messages it covers.
+
+    Fields:
+        reader (ForeignKey): The user who read the messages.
+        listing (ForeignKey): The listing the thread is about.
+        partner (ForeignKey): The other user in the thread (the sender of the messages read).
+        last_read_id (PositiveBigIntegerField): Id of the newest message read in the thread.
+        updated_at (DateTimeField): When the watermark last moved.
+    """
+    reader = models.ForeignKey(User, on_delete=models.CASCADE, related_name='read_receipts')
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='read_receipts')
+    partner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    last_read_id = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('reader', 'listing', 'partner')  # One watermark per participant per thread
+        verbose_name = 'ReadReceipt'
+        verbose_name_plural = 'ReadReceipts'
+
+    def __str__(self):
+        return f"User {self.reader_id} read up to message {self.last_read_id} on listing {self.listing_id}"
+
+    @classmethod
+    def mark_read(cls, reader, listing, partner, up_to_id=None):
+        """
+        Move the reader's watermark for a thread forward to ``up_to_id``.
+
+        Defaults to the newest message the reader has received in the thread.
+        The watermark never moves backwards, so stale or out-of-order calls
+        are harmless.
+        """
+        if up_to_id is None:
+            up_to_id = (Message.objects.filter(receiver=reader, listing=listing, sender=partner)
+                        .aggregate(newest=models.Max('id'))['newest'])
+            if up_to_id is None:
+                return
+        receipt = cls.objects.filter(reader=reader, listing=listing, partner=partner)
+        if receipt.filter(last_read_id__lt=up_to_id).update(last_read_id=up_to_id, updated_at=timezone.now()):
+            return
+        _, created = cls.objects.get_or_create(
+            reader=reader, listing=listing, partner=partner,
+            defaults={'last_read_id': up_to_id},
+        )
+        if not created:
+            # Another call may have created the receipt with a lower watermark since our UPDATE
+            receipt.filter(last_read_id__lt=up_to_id).update(last_read_id=up_to_id, updated_at=timezone.now())
+
+
 class Review(models.Model):
     """
     Model representing a review of a seller by a user.
@@ -212,4 +292,134 @@ class Notification(models.Model):
         verbose_name_plural = 'Notifications'
 
     def __str__(self):
-        return f"Notification for {self.user}: {self.message}"
\ No newline at end of file
+        return f"Notification for {self.user}: {self.message}"
+
+
+class SavedSearchQuerySet(models.QuerySet):
+    # Fields search_match_key reads; match_key has to be recomputed when they change
+    KEY_FIELDS = {'category', 'category_id', 'size', 'condition', 'keywords'}
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """Validate and file each search under its match_key, as save() does."""
+        from .search import search_match_key
+        objs = list(objs)
+        for search in objs:
+            search.clean()
+            search.match_key = search_match_key(search)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def update(self, **kwargs):
+        # A single UPDATE can't recompute each row's match_key
+        if self.KEY_FIELDS & kwargs.keys():
+            raise ValueError('Saved search constraints must be changed with save() so match_key stays current.')
+        return super().update(**kwargs)
+
+
+class SavedSearch(models.Model):
+    """
+    Model representing a buyer's saved search, used to alert them when a matching listing is posted.
+
+    Every constraint that is set must hold for a listing to match, and at least
+    one of category, size, condition or keywords is required. Each search is
+    filed in the inverted index under a single ``match_key`` (a keyword, or the
+    combination of its category, size and condition), so matching a listing
+    only has to look at searches filed under one of the listing's own keys
+    rather than every saved search. The key is set by save() and bulk_create();
+    QuerySet.update() refuses to change the fields it is derived from.
+
+    Fields:
+        user (ForeignKey): The user who saved the search.
+        category (ForeignKey): Optional category the listing must belong to.
+        size (CharField): Optional size the listing must have.
+        condition (CharField): Optional condition the listing must be in.
+        min_price (DecimalField): Optional lower bound on the listing price.
+        max_price (DecimalField): Optional upper bound on the listing price.
+        keywords (CharField): Optional space-separated words that must all appear in the title or description.
+        match_key (CharField): Inverted index key, derived from the constraints on save.
+        created_at (DateTimeField): When the search was saved.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='saved_searches')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, related_name='saved_searches')
+    size = models.CharField(max_length=10, choices=Listing.SIZE_CHOICES, blank=True)
+    condition = models.CharField(max_length=50, choices=Listing.CONDITION_CHOICES, blank=True)
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    keywords = models.CharField(max_length=255, blank=True)
+    match_key = models.CharField(max_length=260, db_index=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = SavedSearchQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = 'SavedSearch'
+        verbose_name_plural = 'SavedSearches'
+
+    def __str__(self):
+        return f"Saved search {self.pk} for user {self.user_id}"
+
+    def clean(self):
+        from .search import search_match_key
+        if not search_match_key(self):
+            # A price range alone would have to be checked against every listing
+            raise ValidationError('Choose a category, size, condition or keywords to search for.')
+
+    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
+        from .search import search_match_key
+        self.clean()
+        self.match_key = search_match_key(self)
+        if update_fields is not None:
+            update_fields = {*update_fields, 'match_key'}
+        super().save(force_insert=force_insert, force_update=force_update, using=using,
+                     update_fields=update_fields)
+
+
+class SavedSearchAlert(models.Model):
+    """
+    Model recording that a user has been notified about a listing, so saved
+    search matches aren't sent again when the listing is edited.
+
+    Fields:
+        user (ForeignKey): The user who was notified.
+        listing (ForeignKey): The listing they were notified about.
+        created_at (DateTimeField): When the notification was sent.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='saved_search_alerts')
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='saved_search_alerts')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'listing')  # Alert a user about a listing at most once
+        verbose_name = 'SavedSearchAlert'
+        verbose_name_plural = 'SavedSearchAlerts'
+
+    def __str__(self):
+        return f"User {self.user_id} alerted about listing {self.listing_id}"
+
+
+class MediaBlob(models.Model):
+    """
+    Model representing one deduplicated file in media storage (see marketplace.storage).
+
+    Fields:
+        digest (CharField): SHA-256 of the file's content, in hex.
+        name (CharField): Name of the file in the storage backend.
+        size (PositiveBigIntegerField): Size of the file in bytes.
+        ref_count (PositiveIntegerField): Number of saved model rows pointing at the file.
+        created_at (DateTimeField): When the file was first stored.
+        last_used_at (DateTimeField): When the file was last stored or reused by an upload.
+    """
+    digest = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = 'MediaBlob'
+        verbose_name_plural = 'MediaBlobs'
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} references)"
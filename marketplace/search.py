@@ -0,0 +1,186 @@
+"""
+Incremental matching of listings against saved searches.
+
+Saved searches are filed under one key (see ``search_match_key``): a keyword,
+or the combination of the category, size and condition they ask for. A
+listing produces every key it could satisfy (see ``listing_match_keys``), so
+the candidate searches for a batch of listings are fetched with an indexed
+``match_key IN (...)`` lookup and then checked in full in Python. The cost of
+matching depends on how many searches share a listing's keys, not on the
+total number of saved searches.
+"""
+import re
+import threading
+from itertools import product
+
+from django.db import models, transaction
+
+from .models import Listing, Notification, SavedSearch, SavedSearchAlert
+
+# Keep the IN (...) clause well under backend parameter limits
+KEY_CHUNK_SIZE = 500
+
+# Candidate searches are streamed from the database in chunks of this size
+SEARCH_CHUNK_SIZE = 2000
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Per-thread, per-database listing ids waiting to be matched after commit
+_pending = threading.local()
+
+
+def tokenize(text):
+    return set(_TOKEN_RE.findall((text or '').lower()))
+
+
+def _attribute_key(category_id, size, condition):
+    parts = []
+    if category_id:
+        parts.append(f'category:{category_id}')
+    if size:
+        parts.append(f'size:{size}')
+    if condition:
+        parts.append(f'condition:{condition}')
+    return '|'.join(parts)
+
+
+def search_match_key(search):
+    """
+    Pick the single key a saved search is filed under.
+
+    Keywords are the most selective constraint, so a search with keywords is
+    filed under its longest one. Otherwise it's filed under the combination of
+    its category, size and condition. Returns an empty string for searches
+    with none of these, which can't be indexed.
+    """
+    words = tokenize(search.keywords)
+    if words:
+        # longest word first, ties broken alphabetically so the key is stable
+        return 'kw:' + min(words, key=lambda word: (-len(word), word))
+    return _attribute_key(search.category_id, search.size, search.condition)
+
+
+def listing_match_keys(listing):
+    """Every key a saved search matching ``listing`` could be filed under."""
+    attributes = (listing.category_id, listing.size, listing.condition)
+    keys = set()
+    # one key per combination of the listing's attributes
+    for kept in product((True, False), repeat=len(attributes)):
+        key = _attribute_key(*(value if keep else None for value, keep in zip(attributes, kept)))
+        if key:
+            keys.add(key)
+    keys.update('kw:' + word for word in tokenize(f'{listing.title} {listing.description}'))
+    return keys
+
+
+def search_matches(search, listing, words=None):
+    """Check every constraint of ``search`` against ``listing``."""
+    if search.user_id == listing.seller_id:
+        return False
+    if search.category_id and search.category_id != listing.category_id:
+        return False
+    if search.size and search.size != listing.size:
+        return False
+    if search.condition and search.condition != listing.condition:
+        return False
+    if search.min_price is not None and listing.price < search.min_price:
+        return False
+    if search.max_price is not None and listing.price > search.max_price:
+        return False
+    if search.keywords:
+        if words is None:
+            words = tokenize(f'{listing.title} {listing.description}')
+        if not tokenize(search.keywords) <= words:
+            return False
+    return True
+
+
+def _candidate_searches(keys, listings):
+    """Stream the saved searches filed under ``keys`` whose price range overlaps the batch."""
+    lowest = min(listing.price for listing in listings)
+    highest = max(listing.price for listing in listings)
+    for start in range(0, len(keys), KEY_CHUNK_SIZE):
+        yield from (SavedSearch.objects
+                    .filter(match_key__in=keys[start:start + KEY_CHUNK_SIZE])
+                    .filter(models.Q(min_price__isnull=True) | models.Q(min_price__lte=highest))
+                    .filter(models.Q(max_price__isnull=True) | models.Q(max_price__gte=lowest))
+                    .order_by()
+                    .iterator(chunk_size=SEARCH_CHUNK_SIZE))
+
+
+def match_listings(listings):
+    """
+    Match a batch of listings against saved searches and notify the owners.
+
+    Only available listings are matched. A user is notified about a listing
+    at most once, even if several of their searches match or the listing is
+    matched again after an edit. All notifications for the batch are written
+    with a single ``bulk_create``. Listings saved with ``save()`` are matched
+    from ``post_save`` once their transaction commits; callers that
+    ``bulk_create`` listings should pass the batch here themselves.
+
+    Returns the list of created notifications.
+    """
+    listings = [listing for listing in listings if listing.status == 'available']
+    if not listings:
+        return []
+
+    listings_by_key = {}
+    for listing in listings:
+        for key in listing_match_keys(listing):
+            listings_by_key.setdefault(key, []).append(listing)
+    words_by_listing = {listing.pk: tokenize(f'{listing.title} {listing.description}') for listing in listings}
+
+    matches = {}
+    for search in _candidate_searches(sorted(listings_by_key), listings):
+        for listing in listings_by_key[search.match_key]:
+            if (search.user_id, listing.pk) not in matches and \
+                    search_matches(search, listing, words_by_listing[listing.pk]):
+                matches[search.user_id, listing.pk] = listing
+    if not matches:
+        return []
+
+    already_alerted = set(SavedSearchAlert.objects
+                          .filter(listing__in=[listing.pk for listing in listings],
+                                  user__in={user_id for user_id, _ in matches})
+                          .values_list('user_id', 'listing_id'))
+    new_matches = [(user_id, listing) for (user_id, listing_id), listing in matches.items()
+                   if (user_id, listing_id) not in already_alerted]
+
+    SavedSearchAlert.objects.bulk_create(
+        [SavedSearchAlert(user_id=user_id, listing=listing) for user_id, listing in new_matches],
+        ignore_conflicts=True,
+    )
+    return Notification.objects.bulk_create([
+        Notification(user_id=user_id,
+                     message=f"New listing matching your saved search: {listing.title}"[:255])
+        for user_id, listing in new_matches
+    ])
+
+
+def _match_pending(using):
+    """on_commit callback: match every listing queued on ``using`` so far."""
+    listing_ids = _pending.listing_ids.pop(using, None)
+    if not listing_ids:
+        # An earlier callback of the same transaction already matched them
+        return
+    # Reload so the match sees the committed state of each listing
+    match_listings(Listing.objects.using(using).filter(pk__in=listing_ids))
+
+
+def listing_saved(sender, instance, raw=False, using=None, **kwargs):
+    """
+    post_save receiver: queue the listing to be matched when its transaction commits.
+
+    Every save registers its own callback, but they share one batch per
+    database, so the first callback to run matches all the listings saved in
+    the transaction and the rest find nothing left to do. Listings queued by a
+    transaction that rolled back are matched with the next batch; reloading
+    them and the alert deduplication in match_listings make that harmless.
+    """
+    if raw:
+        return
+    if not hasattr(_pending, 'listing_ids'):
+        _pending.listing_ids = {}
+    _pending.listing_ids.setdefault(using, set()).add(instance.pk)
+    transaction.on_commit(lambda: _match_pending(using), using=using)
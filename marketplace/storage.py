@@ -0,0 +1,277 @@
+"""
+Content-addressed media storage.
+
+Uploaded files are stored once per distinct content, named after their
+SHA-256 digest, on top of any Django storage backend (local FileSystemStorage
+by default, or an S3-compatible bucket such as MinIO via django-storages).
+
+MediaBlob rows count how many saved model rows point at each stored file.
+The counts are kept by the model signals below, inside the model's own
+transaction: a save adds a reference, replacing or deleting a file releases
+one, and the underlying file is removed with the last reference. Files that
+were stored but never referenced (e.g. the model save failed) stay at zero
+references and are removed by ``collect_unreferenced``. Models with tracked
+file fields use ``AtomicSaveMixin`` so the counts commit or roll back with
+the row.
+"""
+import hashlib
+import os
+
+from django.core.files.storage import Storage
+from django.db import IntegrityError, models, router, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+from django.utils.module_loading import import_string
+
+# Size of the pieces uploads are hashed and copied in
+CHUNK_SIZE = 1024 * 1024
+
+
+class AtomicSaveMixin:
+    """Model mixin saving the row and its media reference counts in one transaction."""
+
+    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
+        # Resolve the database the same way Model.save does, so the transaction covers the write
+        using = using or router.db_for_write(self.__class__, instance=self)
+        with transaction.atomic(using=using):
+            super().save(force_insert=force_insert, force_update=force_update, using=using,
+                         update_fields=update_fields)
+
+
+@deconstructible
+class ContentAddressedStorage(Storage):
+    """
+    Storage that deduplicates files by content.
+
+    ``backend`` is the dotted path of the storage class that holds the bytes
+    and ``backend_options`` its keyword arguments. Saving content that is
+    already stored returns the existing name, so nothing is written to (or
+    uploaded to) the backend again.
+    """
+
+    def __init__(self, backend='django.core.files.storage.FileSystemStorage', backend_options=None):
+        self.backend_path = backend
+        self.backend_options = backend_options or {}
+        self.backend = import_string(backend)(**self.backend_options)
+
+    def get_available_name(self, name, max_length=None):
+        # Names are derived from content in _save, so there is nothing to avoid
+        return name
+
+    def _save(self, name, content):
+        from .models import MediaBlob
+
+        digest, size = self._digest(content)
+        stored_name = f'sha256/{digest[:2]}/{digest}{os.path.splitext(name)[1].lower()}'
+        while True:
+            existing = self._reuse(digest)
+            if existing:
+                return existing
+            try:
+                # The row is written before the upload, so a pending delete of the
+                # same name (see _delete_if_unreferenced) either waits for it or
+                # finishes before the upload starts
+                with transaction.atomic():
+                    MediaBlob.objects.create(digest=digest, name=stored_name, size=size)
+                    if not self.backend.exists(stored_name):
+                        self.backend.save(stored_name, content)
+            except IntegrityError:
+                # Another upload of the same content won the race; share its file
+                continue
+            return stored_name
+
+    def _reuse(self, digest):
+        """
+        Return the name of the stored file with ``digest``, or None if there is none.
+
+        The blob is locked and its last_used_at bumped, so collect_unreferenced
+        doesn't remove it before the model save that reuses it adds its
+        reference. The locking read also sees rows committed after a
+        REPEATABLE READ transaction's snapshot was taken.
+        """
+        from .models import MediaBlob
+
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(digest=digest).first()
+            if blob is None:
+                return None
+            blob.last_used_at = timezone.now()
+            blob.save(update_fields=['last_used_at'])
+        return blob.name
+
+    def _digest(self, content):
+        sha256 = hashlib.sha256()
+        size = 0
+        content.seek(0)
+        for chunk in content.chunks(CHUNK_SIZE):
+            sha256.update(chunk)
+            size += len(chunk)
+        content.seek(0)
+        return sha256.hexdigest(), size
+
+    def delete(self, name):
+        """
+        Remove ``name`` if no saved model refers to it.
+
+        References are released by the model signals, so deleting a file that
+        is still referenced elsewhere leaves it in place.
+        """
+        from .models import MediaBlob
+
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(name=name).first()
+            if blob is not None:
+                if blob.ref_count > 0:
+                    return
+                blob.delete()
+        transaction.on_commit(lambda: self._delete_if_unreferenced(name))
+
+    def release(self, name):
+        """Drop one reference to ``name``, removing the file with the last one."""
+        from .models import MediaBlob
+
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(name=name).first()
+            if blob is None:
+                # Stored before deduplication was enabled, so nothing else refers to it
+                transaction.on_commit(lambda: self.backend.delete(name))
+                return
+            if blob.ref_count > 1:
+                MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+                return
+            blob.delete()
+        transaction.on_commit(lambda: self._delete_if_unreferenced(name))
+
+    def delete_unused(self, name, unused_since):
+        """
+        Remove ``name`` if nothing refers to it and no upload has reused it
+        since ``unused_since``. Returns whether it was removed.
+        """
+        from .models import MediaBlob
+
+        with transaction.atomic():
+            blob = (MediaBlob.objects.select_for_update()
+                    .filter(name=name, ref_count=0, last_used_at__lt=unused_since).first())
+            if blob is None:
+                return False
+            blob.delete()
+        transaction.on_commit(lambda: self._delete_if_unreferenced(name))
+        return True
+
+    def _delete_if_unreferenced(self, name):
+        from .models import MediaBlob
+
+        # The same content may have been uploaded again since the blob was
+        # dropped, and on S3 it reuses the name; only delete if it hasn't
+        with transaction.atomic():
+            if not MediaBlob.objects.select_for_update().filter(name=name).exists():
+                self.backend.delete(name)
+
+    def _open(self, name, mode='rb'):
+        return self.backend.open(name, mode)
+
+    def exists(self, name):
+        return self.backend.exists(name)
+
+    def listdir(self, path):
+        return self.backend.listdir(path)
+
+    def size(self, name):
+        return self.backend.size(name)
+
+    def url(self, name):
+        return self.backend.url(name)
+
+    def path(self, name):
+        return self.backend.path(name)
+
+    def get_modified_time(self, name):
+        return self.backend.get_modified_time(name)
+
+
+def _tracked_file_fields(instance, update_fields=None):
+    for field in instance._meta.concrete_fields:
+        if not isinstance(field, models.FileField) or not isinstance(field.storage, ContentAddressedStorage):
+            continue
+        if update_fields is not None and field.name not in update_fields:
+            continue
+        yield field
+
+
+def remember_files(sender, instance, raw=False, update_fields=None, **kwargs):
+    """pre_save receiver: note the file names the row had before this save."""
+    if raw or instance._state.adding:
+        instance._stored_file_names = {}
+        return
+    fields = list(_tracked_file_fields(instance, update_fields))
+    if not fields:
+        instance._stored_file_names = {}
+        return
+    previous = (sender._base_manager.using(instance._state.db).filter(pk=instance.pk)
+                .values(*[field.attname for field in fields]).first()) or {}
+    instance._stored_file_names = previous
+
+
+def reference_files(sender, instance, raw=False, update_fields=None, **kwargs):
+    """post_save receiver: add a reference to new files and release replaced ones."""
+    from .models import MediaBlob
+
+    if raw:
+        return
+    previous = getattr(instance, '_stored_file_names', {})
+    for field in _tracked_file_fields(instance, update_fields):
+        old_name = previous.get(field.attname) or ''
+        new_name = getattr(instance, field.attname).name or ''
+        if new_name == old_name:
+            continue
+        if new_name:
+            MediaBlob.objects.filter(name=new_name).update(ref_count=F('ref_count') + 1)
+        if old_name:
+            field.storage.release(old_name)
+
+
+def release_files(sender, instance, **kwargs):
+    """post_delete receiver: drop the references held by the instance's file fields."""
+    for field in _tracked_file_fields(instance):
+        name = getattr(instance, field.attname).name
+        if name:
+            field.storage.release(name)
+
+
+def collect_unreferenced(older_than, storage=None):
+    """
+    Remove stored files no saved model refers to.
+
+    That covers blobs left at zero references (the model save after the
+    upload failed) and files in the backend with no blob row at all (the
+    transaction that created the row rolled back). Only files stored before
+    ``older_than`` (a timedelta) ago and not reused by an upload since are
+    collected, so uploads still waiting for their model save are kept.
+    Returns the number of files removed.
+    """
+    from django.core.files.storage import default_storage
+
+    from .models import MediaBlob
+
+    storage = storage or default_storage
+    cutoff = timezone.now() - older_than
+
+    candidates = MediaBlob.objects.filter(ref_count=0, last_used_at__lt=cutoff).values_list('name', flat=True)
+    # Each candidate is re-checked under its row lock, as an upload may reuse it meanwhile
+    collected = {name for name in candidates if storage.delete_unused(name, cutoff)}
+
+    removed = len(collected)
+    try:
+        directories = storage.listdir('sha256')[0]
+    except FileNotFoundError:
+        return removed
+    for directory in directories:
+        stored = {f'sha256/{directory}/{filename}' for filename in storage.listdir(f'sha256/{directory}')[1]}
+        known = set(MediaBlob.objects.filter(name__in=stored).values_list('name', flat=True))
+        # names collected above are already queued for deletion
+        for name in stored - known - collected:
+            if storage.get_modified_time(name) < cutoff:
+                storage.delete(name)
+                removed += 1
+    return removed
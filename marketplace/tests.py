@@ -1,3 +1,529 @@
-from django.test import TestCase
+import os
+import re
+import shutil
+import tempfile
+import unittest
+import uuid
+from collections import Counter
+from datetime import timedelta
+from unittest import mock
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+
+from . import models
+from .search import listing_match_keys, match_listings, search_match_key
+from .storage import ContentAddressedStorage, collect_unreferenced
+
+# Exact number of queries each page may run, whatever the number of rows
+# shown. Every registered admin and every public endpoint needs an entry, so
+# new pages get a budget when they're added. Admin pages include the session
+# and logged-in user lookups.
+ADMIN_CHANGELIST_BUDGETS = {
+    'auth.group': 5,
+    'auth.user': 6,
+    'marketplace.category': 5,
+    'marketplace.listing': 9,
+    'marketplace.listingimage': 5,
+    'marketplace.mediablob': 5,
+    'marketplace.message': 5,
+    'marketplace.notification': 5,
+    'marketplace.readreceipt': 5,
+    'marketplace.review': 5,
+    'marketplace.savedsearch': 5,
+    'marketplace.savedsearchalert': 5,
+    'marketplace.user': 5,
+}
+
+PUBLIC_ENDPOINT_BUDGETS = {
+    '/marketplace/listings/': 0,
+}
+
+_LITERAL_RE = re.compile(r"'[^']*'|\b\d+\b")
+
+
+def repeated_queries_report(queries):
+    """
+    Group captured queries by shape (literals replaced with ?) and describe the
+    ones that ran more than once, which is what an N+1 looks like.
+    """
+    shapes = Counter(_LITERAL_RE.sub('?', query['sql']) for query in queries)
+    repeated = [(count, sql) for sql, count in shapes.most_common() if count > 1]
+    if not repeated:
+        return 'no repeated queries'
+    return '\n'.join(f'  {count}x {sql}' for count, sql in repeated)
+
+
+def public_paths(patterns=None, prefix=''):
+    """Paths of every non-admin URL pattern that takes no arguments."""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            if pattern.app_name != 'admin':
+                yield from public_paths(pattern.url_patterns, route)
+        elif isinstance(pattern, URLPattern) and not pattern.pattern.converters:
+            yield '/' + route
+
+
+def seed(count, start=0):
+    """Create ``count`` rows of every marketplace model (and the auth models admin shows)."""
+    for i in range(start, start + count):
+        get_user_model().objects.create(username=f'staff-{i}')
+        Group.objects.create(name=f'group-{i}')
+
+        seller = models.User.objects.create(username=f'seller-{i}')
+        buyer = models.User.objects.create(username=f'buyer-{i}')
+        category = models.Category.objects.create(name=f'category-{i}')
+        listing = models.Listing.objects.create(
+            seller=seller, title=f'listing-{i}', description='seeded', condition='new',
+            price=Decimal('10.00'), category=category,
+        )
+        models.ListingImage.objects.create(listing=listing, image=f'listing_images/{i}.jpg')
+        message = models.Message.objects.create(sender=buyer, receiver=seller, listing=listing, content='hi')
+        models.ReadReceipt.objects.create(reader=seller, listing=listing, partner=buyer, last_read_id=message.id)
+        models.Review.objects.create(reviewer=buyer, seller=seller, rating=5)
+        models.Notification.objects.create(user=buyer, message='seeded')
+        models.SavedSearch.objects.create(user=buyer, category=category, keywords='seeded')
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Render every admin changelist and public endpoint against seeded data and
+    hold it to its query budget. Each page is rendered at two data sizes, so a
+    query per row fails the test with a report of the repeated queries.
+    """
+    ROWS = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        seed(cls.ROWS)
+
+    def setUp(self):
+        self.client.force_login(self.superuser)
+
+    def assertQueryBudget(self, path, budget):
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, path)
+
+        # Double the data inside a savepoint so every page starts from the same seed
+        with transaction.atomic():
+            seed(self.ROWS, start=self.ROWS)
+            with CaptureQueriesContext(connection) as large:
+                self.client.get(path)
+            transaction.set_rollback(True)
+
+        self.assertEqual(
+            len(small), len(large),
+            f'{path} runs more queries with more rows ({len(small)} -> {len(large)}), '
+            f'likely an N+1:\n{repeated_queries_report(large.captured_queries)}',
+        )
+        self.assertEqual(
+            len(small), budget,
+            f'{path} ran {len(small)} queries, budget is {budget}:\n'
+            f'{repeated_queries_report(small.captured_queries)}',
+        )
+
+    def test_every_admin_has_a_budget(self):
+        registered = {model._meta.label_lower for model in admin.site._registry}
+        self.assertEqual(registered, set(ADMIN_CHANGELIST_BUDGETS))
+
+    def test_every_public_endpoint_has_a_budget(self):
+        self.assertEqual(set(public_paths()), set(PUBLIC_ENDPOINT_BUDGETS))
+
+    def test_admin_changelists(self):
+        for model in admin.site._registry:
+            label = model._meta.label_lower
+            with self.subTest(label):
+                path = reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+                self.assertQueryBudget(path, ADMIN_CHANGELIST_BUDGETS[label])
+
+    def test_public_endpoints(self):
+        for path, budget in PUBLIC_ENDPOINT_BUDGETS.items():
+            with self.subTest(path):
+                self.client.logout()
+                self.assertQueryBudget(path, budget)
+
+
+class SavedSearchMatchingTests(TestCase):
+    """Saved search indexing and the notifications sent for new and edited listings."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = models.User.objects.create(username='seller')
+        cls.buyer = models.User.objects.create(username='buyer')
+        cls.other_buyer = models.User.objects.create(username='other-buyer')
+        cls.jackets = models.Category.objects.create(name='Jackets')
+        cls.shoes = models.Category.objects.create(name='Shoes')
+
+    def create_listing(self, **fields):
+        fields = {'seller': self.seller, 'title': 'Denim jacket', 'description': 'Barely worn',
+                  'condition': 'like_new', 'price': Decimal('40.00'), 'category': self.jackets,
+                  'size': 'M', **fields}
+        with self.captureOnCommitCallbacks(execute=True):
+            return models.Listing.objects.create(**fields)
+
+    def notified(self):
+        return sorted(models.Notification.objects.values_list('user__username', flat=True))
+
+    def test_match_key_selection(self):
+        search = models.SavedSearch(user=self.buyer, keywords='blue denim', category=self.jackets)
+        self.assertEqual(search_match_key(search), 'kw:denim')
+        search = models.SavedSearch(user=self.buyer, category=self.jackets, condition='new')
+        self.assertEqual(search_match_key(search), f'category:{self.jackets.pk}|condition:new')
+        search = models.SavedSearch(user=self.buyer, size='L')
+        self.assertEqual(search_match_key(search), 'size:L')
+
+    def test_search_needs_a_non_price_constraint(self):
+        for search in (models.SavedSearch(user=self.buyer),
+                       models.SavedSearch(user=self.buyer, min_price=1, max_price=10)):
+            with self.assertRaises(ValidationError):
+                search.save()
+
+    def test_listing_keys_cover_every_attribute_combination(self):
+        listing = models.Listing(title='Denim', description='', category=self.jackets, size='M', condition='new')
+        category = f'category:{self.jackets.pk}'
+        self.assertEqual(listing_match_keys(listing), {
+            category, 'size:M', 'condition:new', f'{category}|size:M', f'{category}|condition:new',
+            'size:M|condition:new', f'{category}|size:M|condition:new', 'kw:denim',
+        })
+
+    def test_only_matching_searches_are_notified(self):
+        models.SavedSearch.objects.create(user=self.buyer, category=self.jackets, size='M', max_price=50)
+        models.SavedSearch.objects.create(user=self.other_buyer, category=self.shoes)
+        models.SavedSearch.objects.create(user=self.other_buyer, keywords='denim', max_price=20)
+        self.create_listing()
+        self.assertEqual(self.notified(), ['buyer'])
+
+    def test_sellers_own_searches_are_skipped(self):
+        models.SavedSearch.objects.create(user=self.seller, category=self.jackets)
+        self.create_listing()
+        self.assertEqual(self.notified(), [])
+
+    def test_one_notification_per_user_and_listing(self):
+        models.SavedSearch.objects.create(user=self.buyer, category=self.jackets)
+        models.SavedSearch.objects.create(user=self.buyer, keywords='jacket')
+        listing = self.create_listing()
+        for price in ('35.00', '30.00', '25.00'):
+            listing.price = Decimal(price)
+            with self.captureOnCommitCallbacks(execute=True):
+                listing.save()
+        self.assertEqual(self.notified(), ['buyer'])
+
+    def test_edit_that_starts_matching_notifies(self):
+        models.SavedSearch.objects.create(user=self.buyer, category=self.jackets, max_price=30)
+        listing = self.create_listing()
+        self.assertEqual(self.notified(), [])
+        listing.price = Decimal('25.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            listing.save()
+        self.assertEqual(self.notified(), ['buyer'])
+
+    def test_search_keys_follow_partial_saves_and_bulk_create(self):
+        search = models.SavedSearch.objects.create(user=self.buyer, category=self.jackets)
+        search.keywords = 'denim'
+        search.save(update_fields=['keywords'])
+        search.refresh_from_db()
+        self.assertEqual(search.match_key, 'kw:denim')
+
+        created = models.SavedSearch.objects.bulk_create([models.SavedSearch(user=self.buyer, size='L')])
+        self.assertEqual(models.SavedSearch.objects.get(pk=created[0].pk).match_key, 'size:L')
+        with self.assertRaises(ValidationError):
+            models.SavedSearch.objects.bulk_create([models.SavedSearch(user=self.buyer, max_price=10)])
+        with self.assertRaises(ValueError):
+            models.SavedSearch.objects.filter(pk=search.pk).update(keywords='wool')
+
+    def test_listings_saved_in_one_transaction_are_matched_together(self):
+        models.SavedSearch.objects.create(user=self.buyer, category=self.jackets)
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                for i in range(5):
+                    models.Listing.objects.create(seller=self.seller, title=f'Jacket {i}', description='',
+                                                  condition='new', price=Decimal('10.00'), category=self.jackets)
+        callbacks[0]()
+        self.assertEqual(self.notified(), ['buyer'] * 5)
+        # The first callback matched the whole transaction
+        with self.assertNumQueries(0):
+            for callback in callbacks[1:]:
+                callback()
+
+    def test_queries_per_batch_do_not_grow_with_listings_or_searches(self):
+        def queries_to_match(searches, listings):
+            with transaction.atomic():
+                for i in range(searches):
+                    models.SavedSearch.objects.create(user=self.buyer, category=self.jackets, min_price=i)
+                    models.SavedSearch.objects.create(user=self.other_buyer, category=self.shoes)
+                batch = models.Listing.objects.bulk_create(
+                    models.Listing(seller=self.seller, title=f'Jacket {i}', description='', condition='new',
+                                   price=Decimal('100.00'), category=self.jackets)
+                    for i in range(listings)
+                )
+                with CaptureQueriesContext(connection) as queries:
+                    notifications = match_listings(batch)
+                self.assertEqual(len(notifications), listings)
+                transaction.set_rollback(True)
+            return len(queries)
+
+        # candidate searches, existing alerts, new alerts, notifications
+        self.assertEqual(queries_to_match(searches=20, listings=5), 4)
+        self.assertEqual(queries_to_match(searches=40, listings=10), 4)
+
+
+class ReadReceiptTests(TestCase):
+    """Per-thread read watermarks and the unread messages derived from them."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = models.User.objects.create(username='seller')
+        cls.buyer = models.User.objects.create(username='buyer')
+        cls.listing = models.Listing.objects.create(seller=cls.seller, title='Jacket', description='',
+                                                    condition='new', price=Decimal('10.00'))
+        cls.messages = [models.Message.objects.create(sender=cls.buyer, receiver=cls.seller,
+                                                      listing=cls.listing, content=str(i))
+                        for i in range(3)]
+        cls.reply = models.Message.objects.create(sender=cls.seller, receiver=cls.buyer,
+                                                  listing=cls.listing, content='reply')
+
+    def unread(self, user):
+        return list(models.Message.objects.unread_for(user).order_by('id'))
+
+    def test_thread_without_receipt_is_unread(self):
+        self.assertEqual(self.unread(self.seller), self.messages)
+        self.assertEqual(self.unread(self.buyer), [self.reply])
+
+    def test_mark_read_defaults_to_newest_received_message(self):
+        models.ReadReceipt.mark_read(self.seller, self.listing, self.buyer)
+        receipt = models.ReadReceipt.objects.get(reader=self.seller)
+        self.assertEqual(receipt.last_read_id, self.messages[-1].id)
+        self.assertEqual(self.unread(self.seller), [])
+        # The buyer's side of the thread is untouched
+        self.assertEqual(self.unread(self.buyer), [self.reply])
+
+    def test_mark_read_up_to_a_message(self):
+        models.ReadReceipt.mark_read(self.seller, self.listing, self.buyer, up_to_id=self.messages[0].id)
+        self.assertEqual(self.unread(self.seller), self.messages[1:])
+
+    def test_watermark_never_moves_backwards(self):
+        models.ReadReceipt.mark_read(self.seller, self.listing, self.buyer, up_to_id=self.messages[1].id)
+        models.ReadReceipt.mark_read(self.seller, self.listing, self.buyer, up_to_id=self.messages[0].id)
+        self.assertEqual(models.ReadReceipt.objects.get().last_read_id, self.messages[1].id)
+
+    def test_mark_read_is_a_single_write_once_the_receipt_exists(self):
+        models.ReadReceipt.mark_read(self.seller, self.listing, self.buyer, up_to_id=self.messages[0].id)
+        with CaptureQueriesContext(connection) as queries:
+            models.ReadReceipt.mark_read(self.seller, self.listing, self.buyer, up_to_id=self.messages[2].id)
+        self.assertEqual(len(queries), 1)
+
+    def test_lower_receipt_created_concurrently_is_raised(self):
+        # Simulate another request creating the receipt between our UPDATE and get_or_create
+        real_get_or_create = models.ReadReceipt.objects.get_or_create
+
+        def racing_get_or_create(**kwargs):
+            models.ReadReceipt.objects.create(reader=self.seller, listing=self.listing, partner=self.buyer,
+                                              last_read_id=self.messages[0].id)
+            return real_get_or_create(**kwargs)
+
+        with mock.patch.object(models.ReadReceipt.objects, 'get_or_create', racing_get_or_create):
+            models.ReadReceipt.mark_read(self.seller, self.listing, self.buyer, up_to_id=self.messages[2].id)
+        self.assertEqual(models.ReadReceipt.objects.get().last_read_id, self.messages[2].id)
+
+
+class ReadReceiptMigrationTests(TransactionTestCase):
+    """Migration 0009 collapses Message.read flags into receipts and expands them back."""
+    before = [('marketplace', '0008_savedsearch')]
+    after = [('marketplace', '0009_readreceipt')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_round_trip(self):
+        apps = self.migrate(self.before)
+        User = apps.get_model('marketplace', 'User')
+        Listing = apps.get_model('marketplace', 'Listing')
+        Message = apps.get_model('marketplace', 'Message')
+        seller = User.objects.create(username='seller')
+        buyer = User.objects.create(username='buyer')
+        listing = Listing.objects.create(seller=seller, title='Jacket', description='', condition='new', price=1)
+        read_flags = [True, True, False]
+        ids = [Message.objects.create(sender=buyer, receiver=seller, listing=listing, content='hi', read=read).id
+               for read in read_flags]
+        Message.objects.create(sender=seller, receiver=buyer, listing=listing, content='unread reply')
+
+        apps = self.migrate(self.after)
+        ReadReceipt = apps.get_model('marketplace', 'ReadReceipt')
+        receipt = ReadReceipt.objects.get()
+        self.assertEqual((receipt.reader_id, receipt.partner_id, receipt.last_read_id), (seller.id, buyer.id, ids[1]))
+
+        apps = self.migrate(self.before)
+        Message = apps.get_model('marketplace', 'Message')
+        self.assertEqual(list(Message.objects.filter(sender_id=buyer.id).order_by('id').values_list('read', flat=True)),
+                         read_flags)
+        self.assertFalse(Message.objects.get(sender_id=seller.id).read)
+
+
+class ContentAddressedStorageTests(TestCase):
+    """Deduplication and reference counting on the local filesystem backend."""
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        self.storage = ContentAddressedStorage(backend_options={'location': self.location})
+        patcher = mock.patch.object(models.ListingImage._meta.get_field('image'), 'storage', self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        seller = models.User.objects.create(username='seller')
+        self.listing = models.Listing.objects.create(seller=seller, title='jacket', description='',
+                                                     condition='new', price=Decimal('1.00'))
+
+    def create_image(self, content, name='jacket.jpg'):
+        image = models.ListingImage(listing=self.listing)
+        image.image.save(name, ContentFile(content))
+        return image
+
+    def ref_count(self, name):
+        return models.MediaBlob.objects.get(name=name).ref_count
+
+    def test_identical_content_is_stored_once(self):
+        first = self.storage.save('listing_images/a.jpg', ContentFile(b'same photo'))
+        second = self.storage.save('profile_pics/b.JPG', ContentFile(b'same photo'))
+        other = self.storage.save('listing_images/c.jpg', ContentFile(b'another photo'))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertTrue(first.endswith('.jpg'))
+        self.assertEqual(models.MediaBlob.objects.count(), 2)
+        # Nothing refers to the files until a model is saved with them
+        self.assertEqual(self.ref_count(first), 0)
+
+    def test_file_is_removed_with_its_last_reference(self):
+        first = self.create_image(b'photo')
+        second = self.create_image(b'photo')
+        name = first.image.name
+        self.assertEqual(second.image.name, name)
+        self.assertEqual(self.ref_count(name), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(self.ref_count(name), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(models.MediaBlob.objects.exists())
+
+    def test_replacing_a_file_releases_the_old_one(self):
+        image = self.create_image(b'old photo')
+        old_name = image.image.name
+        with self.captureOnCommitCallbacks(execute=True):
+            image.image.save('new.jpg', ContentFile(b'new photo'))
+        self.assertFalse(self.storage.exists(old_name))
+        self.assertFalse(models.MediaBlob.objects.filter(name=old_name).exists())
+        self.assertEqual(self.ref_count(image.image.name), 1)
+
+    def test_deleting_a_shared_field_file_keeps_it_for_the_others(self):
+        first = self.create_image(b'photo')
+        second = self.create_image(b'photo')
+        with self.captureOnCommitCallbacks(execute=True):
+            first.image.delete()
+        self.assertTrue(self.storage.exists(second.image.name))
+        self.assertEqual(self.ref_count(second.image.name), 1)
+
+    def test_unreferenced_files_are_collected(self):
+        # An upload whose model save never happened, and a file whose blob row was rolled back
+        unreferenced = self.storage.save('a.jpg', ContentFile(b'abandoned'))
+        orphan = self.storage.backend.save('sha256/ab/orphan.jpg', ContentFile(b'orphan'))
+        kept = self.create_image(b'kept').image.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(collect_unreferenced(timedelta(0), self.storage), 2)
+        self.assertFalse(self.storage.exists(unreferenced))
+        self.assertFalse(self.storage.exists(orphan))
+        self.assertTrue(self.storage.exists(kept))
+
+    def test_reused_file_is_not_collected(self):
+        name = self.storage.save('a.jpg', ContentFile(b'photo'))
+        two_hours_ago = timezone.now() - timedelta(hours=2)
+        models.MediaBlob.objects.update(created_at=two_hours_ago, last_used_at=two_hours_ago)
+        # A new upload of the same content, whose model save hasn't happened yet
+        self.assertEqual(self.storage.save('b.jpg', ContentFile(b'photo')), name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(collect_unreferenced(timedelta(hours=1), self.storage), 0)
+        self.assertTrue(self.storage.exists(name))
+
+    def test_upload_that_loses_the_insert_race_shares_the_file(self):
+        name = self.storage.save('a.jpg', ContentFile(b'photo'))
+        real_reuse = self.storage._reuse
+        lookups = []
+
+        def reuse_after_first_lookup(digest):
+            # The other upload's row isn't visible yet the first time this one looks
+            lookups.append(digest)
+            return real_reuse(digest) if len(lookups) > 1 else None
+
+        with mock.patch.object(self.storage, '_reuse', reuse_after_first_lookup):
+            self.assertEqual(self.storage.save('b.jpg', ContentFile(b'photo')), name)
+        self.assertEqual(len(lookups), 2)
+        self.assertEqual(models.MediaBlob.objects.count(), 1)
+
+    def test_reupload_before_pending_delete_keeps_the_file(self):
+        image = self.create_image(b'photo')
+        name = image.image.name
+        with self.captureOnCommitCallbacks() as callbacks:
+            image.delete()
+        # The same content is uploaded again before the delete callback runs
+        self.assertEqual(self.create_image(b'photo').image.name, name)
+        for callback in callbacks:
+            callback()
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(self.ref_count(name), 1)
+
+
+@unittest.skipUnless(os.environ.get('MEDIA_S3_TEST_ENDPOINT_URL'),
+                     'set MEDIA_S3_TEST_ENDPOINT_URL (and _BUCKET, _ACCESS_KEY, _SECRET_KEY) to run against MinIO')
+class S3ContentAddressedStorageTests(TestCase):
+    """The same behaviour against an S3-compatible bucket, e.g. a local MinIO container."""
+
+    def setUp(self):
+        self.storage = ContentAddressedStorage(
+            backend='storages.backends.s3.S3Storage',
+            backend_options={
+                'bucket_name': os.environ.get('MEDIA_S3_TEST_BUCKET', 'parsim-test'),
+                'endpoint_url': os.environ['MEDIA_S3_TEST_ENDPOINT_URL'],
+                'access_key': os.environ.get('MEDIA_S3_TEST_ACCESS_KEY'),
+                'secret_key': os.environ.get('MEDIA_S3_TEST_SECRET_KEY'),
+                'file_overwrite': True,
+            },
+        )
+
+    def test_dedup_and_delete(self):
+        content = uuid.uuid4().bytes
+        name = self.storage.save('a.jpg', ContentFile(content))
+        self.assertEqual(self.storage.save('b.jpg', ContentFile(content)), name)
+        with self.storage.open(name) as stored:
+            self.assertEqual(stored.read(), content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.storage.delete(name)
+        self.assertFalse(self.storage.exists(name))